@@ -0,0 +1,312 @@
+# Copyright (c) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Solve the grid walking problem for many grids at once with NumPy.
+
+Instead of walking paths with Walker objects, the set of reachable path
+costs is computed for every cell as a bit set packed into uint64 words,
+where bit k is set if some path to that cell costs exactly k.  This is
+the same recurrence as walk_grid.reachable_costs().
+
+The cells on each anti-diagonal don't depend on each other, so a whole
+diagonal is computed with one set of array operations.  Grids of the
+same size are also stacked so every diagonal is computed for all of them
+together.  For a single large grid, WavefrontSolver splits each diagonal
+into chunks that are computed by a pool of threads.
+"""
+
+from __future__ import print_function
+
+import concurrent.futures
+import numpy
+
+DEFAULT_THREADS = 4
+MIN_CHUNK_ROWS = 64
+WORD_BITS = 64
+BLOCK_WORDS = 1 << 15
+
+_ALL_BITS = numpy.uint64(0xffffffffffffffff)
+
+
+def words_for(grids, food):
+  """Return the number of uint64 words needed for the costs of the grids.
+
+  Costs above the food are never useful since costs only grow, and no
+  path costs more than the largest room times the number of steps.
+  """
+
+  most_steps = 2 * grids.shape[1] - 2
+  max_cost = max(0, min(food, int(grids.max()) * most_steps))
+
+  return max_cost // WORD_BITS + 1
+
+
+def shift_costs(reach, costs, out=None):
+  """Add a per-cell cost to packed bit sets of reachable costs.
+
+  Each bit set is shifted up by its cost, carrying bits from each word
+  into the next one.  Costs pushed past the last word are dropped.
+
+  Args:
+    reach: numpy uint64 array of shape (..., W).  Packed bit sets.
+    costs: numpy int array of shape (...).  The cost to add to each.
+    out: numpy uint64 array of shape (..., W) or None.  Where to put the
+      result.  It must not overlap reach.
+  Returns:
+    A numpy uint64 array of shape (..., W).
+  """
+
+  costs = costs.astype(numpy.uint64)[..., numpy.newaxis]
+  if out is None:
+    out = numpy.empty_like(reach)
+
+  if (costs >= WORD_BITS).any():
+    index = (numpy.arange(reach.shape[-1])
+             - (costs // numpy.uint64(WORD_BITS)).astype(numpy.int64))
+    reach = numpy.where(
+        index >= 0,
+        numpy.take_along_axis(reach, numpy.maximum(index, 0), axis=-1), 0)
+    reach = reach.astype(numpy.uint64)
+    costs = costs % numpy.uint64(WORD_BITS)
+
+  numpy.left_shift(reach, costs, out=out)
+  # Two shifts, since shifting a uint64 by 64 is not defined.
+  carry = reach[..., :-1] >> numpy.uint64(1)
+  numpy.right_shift(carry, numpy.uint64(WORD_BITS - 1) - costs, out=carry)
+  out[..., 1:] |= carry
+
+  return out
+
+
+def highest_bit(words):
+  """Return the index of the highest set bit of each nonzero uint64."""
+
+  words = words.copy()
+  bit = numpy.zeros(words.shape, dtype=numpy.int64)
+
+  for step in (32, 16, 8, 4, 2, 1):
+    upper = words >> numpy.uint64(step)
+    has_upper = upper != 0
+    bit += step * has_upper
+    words = numpy.where(has_upper, upper, words)
+
+  return bit
+
+
+def least_left_from_reach(reach, foods):
+  """Find the least food left over for each grid.
+
+  Args:
+    reach: numpy uint64 array of shape (K, W).  Packed reachable costs at
+      the lower right corner of each grid.
+    foods: numpy int array of shape (K,).  The food for each grid.
+  Returns:
+    A numpy int array of shape (K,) of the least food left or -1.
+  """
+
+  width = reach.shape[1]
+  food_word = (foods // WORD_BITS)[:, numpy.newaxis]
+  food_bit = (foods % WORD_BITS).astype(numpy.uint64)[:, numpy.newaxis]
+  index = numpy.arange(width)
+
+  mask = numpy.where(index < food_word, _ALL_BITS, numpy.uint64(0))
+  mask = numpy.where(index == food_word,
+                     _ALL_BITS >> (numpy.uint64(WORD_BITS - 1) - food_bit),
+                     mask)
+  affordable = reach & mask
+
+  nonzero = affordable != 0
+  top_word = width - 1 - numpy.argmax(nonzero[:, ::-1], axis=1)
+  top = affordable[numpy.arange(len(foods)), top_word]
+  best_cost = top_word * WORD_BITS + highest_bit(top)
+
+  return numpy.where(nonzero.any(axis=1) & (foods >= 0), foods - best_cost, -1)
+
+
+def step_diagonal(grids, diagonal, prior, current, start, stop):
+  """Compute the reachable costs of rows start to stop of a diagonal.
+
+  Row j of prior and current holds the cell (j, diagonal - j) of the
+  previous and current diagonals.  The cell above is row j - 1 of prior
+  and the cell to the left is row j of prior.  Rows of prior outside the
+  previous diagonal must be zero.
+
+  Args:
+    grids: numpy int array of shape (K, N, N).
+    diagonal: int.  The diagonal to compute, i + j.
+    prior: numpy uint64 array of shape (K, N, W).
+    current: numpy uint64 array of shape (K, N, W).  Rows start to stop
+      are set.
+    start: int.  The first row.
+    stop: int.  One past the last row.
+  """
+
+  # Work in blocks of rows so the temporaries stay in the CPU cache.
+  block = max(1, BLOCK_WORDS // (prior.shape[0] * prior.shape[2]))
+
+  for first in range(start, stop, block):
+    last = min(first + block, stop)
+    if first > 0:
+      from_prior = prior[:, first:last] | prior[:, first - 1:last - 1]
+    else:
+      from_prior = prior[:, first:last].copy()
+      from_prior[:, 1:] |= prior[:, :last - 1]
+
+    rows = numpy.arange(first, last)
+    shift_costs(from_prior, grids[:, rows, diagonal - rows],
+                out=current[:, first:last])
+
+
+def diagonal_rows(size, diagonal):
+  """Return the first and last rows of the cells on a diagonal."""
+
+  return max(0, diagonal - size + 1), min(diagonal, size - 1)
+
+
+def stacked_answer(grids, foods):
+  """Return the least left or -1 for each of a stack of same sized grids.
+
+  Args:
+    grids: numpy int array of shape (K, N, N).  The upper left of each
+      grid should be 0.
+    foods: numpy int array of shape (K,).  The starting amount of food
+      for each grid.
+  Returns:
+    A numpy int array of shape (K,) of the least food left or -1.
+  """
+
+  count, size = grids.shape[0], grids.shape[1]
+  assert grids.shape[2] == size, 'Grid is not a square.'
+  assert not grids[:, 0, 0].any()
+
+  width = words_for(grids, int(foods.max()))
+
+  prior = numpy.zeros((count, size, width), dtype=numpy.uint64)
+  current = numpy.zeros((count, size, width), dtype=numpy.uint64)
+  prior[:, 0, 0] = 1
+
+  for diagonal in range(1, 2 * size - 1):
+    first, last = diagonal_rows(size, diagonal)
+    # Clear rows left over from two diagonals ago.
+    current[:, max(0, first - 2):first] = 0
+    step_diagonal(grids, diagonal, prior, current, first, last + 1)
+    prior, current = current, prior
+
+  return least_left_from_reach(prior[:, size - 1], foods)
+
+
+def batch_answer(grids, foods):
+  """Return the least left or -1 for each of many grids.
+
+  Grids are grouped by size and each group is solved by stacked_answer().
+
+  Args:
+    grids: list of grids, each a list of list of int as for
+      walk_grid.answer().  The sizes may differ.
+    foods: list of int.  The starting amount of food for each grid.
+  Returns:
+    A list of int, the answer for each grid in the same order.
+  """
+
+  assert len(grids) == len(foods)
+
+  buckets = {}
+  for index, grid in enumerate(grids):
+    buckets.setdefault(len(grid), []).append(index)
+
+  answers = [None] * len(grids)
+
+  for indexes in buckets.values():
+    stacked = numpy.array([grids[x] for x in indexes], dtype=numpy.int64)
+    bucket_foods = numpy.array([foods[x] for x in indexes], dtype=numpy.int64)
+    for index, left in zip(indexes, stacked_answer(stacked, bucket_foods)):
+      answers[index] = int(left)
+
+  return answers
+
+
+class WavefrontSolver(object):
+  """Solve single grids one anti-diagonal at a time with a thread pool.
+
+  Each diagonal is split into chunks of rows and every chunk is computed
+  with bulk NumPy operations, which release the GIL, on a persistent
+  ThreadPoolExecutor.  All chunks of a diagonal finish before the next
+  diagonal starts.
+  """
+
+  def __init__(self, threads=DEFAULT_THREADS, min_chunk_rows=MIN_CHUNK_ROWS):
+    """Start the thread pool.
+
+    Args:
+      threads: int.  The number of worker threads.
+      min_chunk_rows: int.  Diagonals are not split into chunks smaller
+        than this, since tiny chunks cost more to schedule than to compute.
+    """
+
+    self.threads = threads
+    self.min_chunk_rows = min_chunk_rows
+    self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+
+  def chunks(self, first, last):
+    """Split the rows first through last into (start, stop) chunks."""
+
+    rows = last + 1 - first
+    count = max(1, min(self.threads, rows // self.min_chunk_rows))
+    bounds = [first + rows * x // count for x in range(count + 1)]
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+  def answer(self, grid, food):
+    """For the problem, return the least left or -1 if no solution.
+
+    Args:
+      grid: list of list of int or a numpy int array.  The grid should be
+        square and the upper left, grid[0][0], should be 0.
+      food: int.  The starting amount of food.
+    Returns:
+      The least food left, int, or -1.
+    """
+
+    grids = numpy.asarray(grid, dtype=numpy.int64)[numpy.newaxis]
+    size = grids.shape[1]
+    assert grids.shape[2] == size, 'Grid is not a square.'
+    assert grids[0, 0, 0] == 0
+
+    width = words_for(grids, food)
+    prior = numpy.zeros((1, size, width), dtype=numpy.uint64)
+    current = numpy.zeros((1, size, width), dtype=numpy.uint64)
+    prior[0, 0, 0] = 1
+
+    for diagonal in range(1, 2 * size - 1):
+      first, last = diagonal_rows(size, diagonal)
+      # Clear rows left over from two diagonals ago.
+      current[:, max(0, first - 2):first] = 0
+
+      chunks = self.chunks(first, last)
+      if len(chunks) == 1:
+        step_diagonal(grids, diagonal, prior, current, first, last + 1)
+      else:
+        futures = [self.executor.submit(step_diagonal, grids, diagonal,
+                                        prior, current, start, stop)
+                   for start, stop in chunks]
+        for future in futures:
+          future.result()
+
+      prior, current = current, prior
+
+    foods = numpy.array([food])
+    return int(least_left_from_reach(prior[:, size - 1], foods)[0])
+
+  def close(self):
+    """Shut down the thread pool."""
+
+    self.executor.shutdown()
+
+
+def wavefront_answer(grid, food, threads=DEFAULT_THREADS):
+  """Return the least left or -1 for one grid using a WavefrontSolver."""
+
+  solver = WavefrontSolver(threads=threads)
+  try:
+    return solver.answer(grid, food)
+  finally:
+    solver.close()
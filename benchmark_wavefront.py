@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# Copyright (c) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Time the wavefront solver on one large grid for several thread counts."""
+
+from __future__ import print_function
+
+import argparse
+import array_walk_grid
+import multiprocessing
+import random
+import time
+import walk_grid
+
+MAX_ROOM_FOOD = 10
+
+
+def get_args():
+  """Parse command line arguments."""
+
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--grid_size', default=1000, type=int,
+                      help='The size of each side of the grid.')
+  parser.add_argument('--food', default=5000, type=int,
+                      help='Amount of food.')
+  parser.add_argument('--threads', default='1,2,4,8,16,32',
+                      help='Comma separated thread counts to time.')
+  parser.add_argument('--min_chunk_rows', default=None, type=int,
+                      help='Smallest chunk of a diagonal.  By default small '
+                      'enough to give every thread a chunk of the longest '
+                      'diagonal.')
+  parser.add_argument('--repeat', default=3, type=int,
+                      help='Runs of each solver, the fastest is reported.')
+  return parser.parse_args()
+
+
+def create_grid(grid_size):
+  """Randomly create a grid."""
+
+  grid = [[random.randrange(MAX_ROOM_FOOD + 1)
+           for unused_i in range(grid_size)] for unused_j in range(grid_size)]
+  grid[0][0] = 0
+
+  return grid
+
+
+def best_time(solve, repeat):
+  """Run solve() repeat times and return its result and the fastest time."""
+
+  times = []
+  for unused in range(repeat):
+    start = time.time()
+    result = solve()
+    times.append(time.time() - start)
+
+  return result, min(times)
+
+
+def main():
+  """Solve the same grid with each thread count and report the times.
+
+  The first row is walk_grid.reachable_costs(), the single threaded
+  solver that the wavefront solver has to beat.
+  """
+
+  opts = get_args()
+  thread_counts = [int(x) for x in opts.threads.split(',')]
+
+  min_chunk_rows = opts.min_chunk_rows
+  if min_chunk_rows is None:
+    min_chunk_rows = max(1, min(array_walk_grid.MIN_CHUNK_ROWS,
+                                opts.grid_size // max(thread_counts)))
+
+  print('Food: {0}.'.format(opts.food))
+  print('Grid size: {0}.'.format(opts.grid_size))
+  print('Min chunk rows: {0}.'.format(min_chunk_rows))
+  print('CPUs: {0}.'.format(multiprocessing.cpu_count()))
+
+  grid = create_grid(opts.grid_size)
+
+  least_left, base_time = best_time(
+      lambda: walk_grid.least_left_from_costs(
+          walk_grid.reachable_costs(grid), opts.food), opts.repeat)
+
+  print('\nreachable_costs  Result: {0}  Time: {1:.3f}s'.format(
+      least_left, base_time))
+
+  first_time = None
+
+  for threads in thread_counts:
+    solver = array_walk_grid.WavefrontSolver(threads=threads,
+                                             min_chunk_rows=min_chunk_rows)
+    chunks = len(solver.chunks(0, opts.grid_size - 1))
+    if chunks < threads:
+      print('WARNING, {0} threads split the longest diagonal into only {1} '
+            'chunks.'.format(threads, chunks))
+    least_left, elapsed = best_time(
+        lambda: solver.answer(grid, opts.food), opts.repeat)
+    solver.close()
+
+    if first_time is None:
+      first_time = elapsed
+
+    print('Threads: {0:2d}      Result: {1}  Time: {2:.3f}s  '
+          'Speedup: {3:.2f} over 1 thread, {4:.2f} over '
+          'reachable_costs'.format(threads, least_left, elapsed,
+                                   first_time / elapsed, base_time / elapsed))
+
+
+if __name__ == '__main__':
+  main()
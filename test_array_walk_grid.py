@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# Copyright (c) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Test the NumPy grid solvers against the path walking solver."""
+
+
+import random
+import unittest
+import array_walk_grid
+import numpy
+import walk_grid
+
+GRID = [[0, 2, 5], [1, 1, 3], [2, 1, 1]]
+SMALL_GRID = [[0, 2], [1, 3]]
+
+
+def _random_grid(grid_size):
+  """Randomly create a grid."""
+
+  grid = [[random.randrange(11) for unused_i in range(grid_size)]
+          for unused_j in range(grid_size)]
+  grid[0][0] = 0
+
+  return grid
+
+
+def _pack(costs, width):
+  """Pack a set of costs into a numpy uint64 array of width words."""
+
+  bits = sum(1 << x for x in costs)
+  return numpy.array([(bits >> (64 * x)) & (2 ** 64 - 1)
+                      for x in range(width)], dtype=numpy.uint64)
+
+
+def _unpack(words):
+  """Unpack a numpy uint64 array into a set of costs."""
+
+  bits = sum(int(x) << (64 * i) for i, x in enumerate(words))
+  return set(x for x in range(64 * len(words)) if bits >> x & 1)
+
+
+class TestShiftCosts(unittest.TestCase):
+  def test_shift_costs(self):
+    reach = numpy.array([_pack([0, 2], 1), _pack([0, 1], 1)])
+    shifted = array_walk_grid.shift_costs(reach, numpy.array([1, 3]))
+    self.assertEqual([_unpack(x) for x in shifted], [set([1, 3]),
+                                                     set([3, 4])])
+
+  def test_carry(self):
+    reach = numpy.array([_pack([0, 60, 63, 100], 3)])
+    shifted = array_walk_grid.shift_costs(reach, numpy.array([5]))
+    self.assertEqual(_unpack(shifted[0]), set([5, 65, 68, 105]))
+
+  def test_zero_cost(self):
+    reach = numpy.array([_pack([0, 63, 64], 2)])
+    shifted = array_walk_grid.shift_costs(reach, numpy.array([0]))
+    self.assertEqual(_unpack(shifted[0]), set([0, 63, 64]))
+
+  def test_large_cost(self):
+    reach = numpy.array([_pack([1, 63], 3), _pack([2], 3)])
+    shifted = array_walk_grid.shift_costs(reach, numpy.array([70, 1]))
+    self.assertEqual([_unpack(x) for x in shifted], [set([71, 133]),
+                                                     set([3])])
+
+
+class TestLeastLeftFromReach(unittest.TestCase):
+  def test_least_left_from_reach(self):
+    reach = numpy.array([_pack([4, 5, 6, 7, 11], 3)] * 4 +
+                        [_pack([10, 63, 64, 130], 3)] * 3)
+    foods = numpy.array([7, 12, 3, -2, 100, 63, 9])
+    self.assertEqual(
+        array_walk_grid.least_left_from_reach(reach, foods).tolist(),
+        [0, 1, -1, -1, 36, 0, -1])
+
+
+class TestStackedAnswer(unittest.TestCase):
+  def test_stacked_answer(self):
+    grids = numpy.array([GRID, GRID, GRID, GRID])
+    foods = numpy.array([7, 12, 3, 9])
+    self.assertEqual(
+        array_walk_grid.stacked_answer(grids, foods).tolist(), [0, 1, -1, 2])
+
+  def test_negative_food(self):
+    grids = numpy.array([GRID, GRID])
+    foods = numpy.array([-3, 7])
+    self.assertEqual(array_walk_grid.stacked_answer(grids, foods).tolist(),
+                     [-1, 0])
+    self.assertEqual(array_walk_grid.batch_answer([GRID], [-3]), [-1])
+
+  def test_single(self):
+    grids = numpy.array([[[0]]])
+    foods = numpy.array([5])
+    self.assertEqual(array_walk_grid.stacked_answer(grids, foods).tolist(),
+                     [5])
+
+
+class TestBatchAnswer(unittest.TestCase):
+  def test_mixed_sizes(self):
+    grids = [GRID, SMALL_GRID, GRID, [[0]]]
+    foods = [7, 4, 12, 0]
+    self.assertEqual(array_walk_grid.batch_answer(grids, foods),
+                     [0, 0, 1, 0])
+
+  def test_random(self):
+    random.seed(1)
+    grids = [_random_grid(random.randrange(1, 7)) for unused in range(40)]
+    foods = [random.randrange(61) for unused in range(40)]
+    expected = [walk_grid.Collector(grid).least_left(food)
+                for grid, food in zip(grids, foods)]
+    self.assertEqual(array_walk_grid.batch_answer(grids, foods), expected)
+
+  def test_random_large(self):
+    random.seed(3)
+    grids = [_random_grid(random.randrange(1, 21)) for unused in range(60)]
+    foods = [random.randrange(201) for unused in range(60)]
+    expected = [walk_grid.least_left_from_costs(
+        walk_grid.reachable_costs(grid), food)
+                for grid, food in zip(grids, foods)]
+    self.assertEqual(array_walk_grid.batch_answer(grids, foods), expected)
+
+
+class TestWavefrontSolver(unittest.TestCase):
+  def setUp(self):
+    self.solver = array_walk_grid.WavefrontSolver(threads=4, min_chunk_rows=1)
+
+  def tearDown(self):
+    self.solver.close()
+
+  def test_chunks(self):
+    self.assertEqual(self.solver.chunks(0, 0), [(0, 1)])
+    self.assertEqual(self.solver.chunks(2, 9), [(2, 4), (4, 6), (6, 8),
+                                                (8, 10)])
+
+  def test_answer(self):
+    self.assertEqual(self.solver.answer(GRID, 7), 0)
+    self.assertEqual(self.solver.answer(GRID, 12), 1)
+    self.assertEqual(self.solver.answer(GRID, 3), -1)
+    self.assertEqual(self.solver.answer([[0]], 2), 2)
+    self.assertEqual(self.solver.answer(GRID, -4), -1)
+
+  def test_random(self):
+    random.seed(2)
+    for unused in range(20):
+      grid = _random_grid(random.randrange(1, 25))
+      food = random.randrange(201)
+      costs = walk_grid.reachable_costs(grid)
+      self.assertEqual(self.solver.answer(grid, food),
+                       walk_grid.least_left_from_costs(costs, food))
+
+  def test_blocks(self):
+    saved = array_walk_grid.BLOCK_WORDS
+    array_walk_grid.BLOCK_WORDS = 1
+    try:
+      self.test_random()
+    finally:
+      array_walk_grid.BLOCK_WORDS = saved
+
+  def test_wavefront_answer(self):
+    self.assertEqual(array_walk_grid.wavefront_answer(GRID, 9, threads=2), 2)
+
+
+if __name__ == '__main__':
+  unittest.main()
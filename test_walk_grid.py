@@ -10,6 +10,9 @@
 """
 
 
+import os
+import shutil
+import tempfile
 import unittest
 import walk_grid
 
@@ -21,6 +24,14 @@ SMALL_GRID = [[0, 2], [1, 3]]
 SMALL_COSTS = set([4, 5])
 SMALL_STEPS = 4
 
+GRID_COSTS = set([4, 5, 6, 7, 11])
+
+
+def _bits(costs):
+  """Convert a set of costs to a bit set."""
+
+  return sum(1 << x for x in costs)
+
 
 class _BadDirection(object):
   """A bad direction for testing direction type."""
@@ -196,5 +207,173 @@ class TestTrimCollector(TestCollector):
     self.assertEqual(self.collector.least_left(3), -1)
 
 
+class TestReachableCosts(unittest.TestCase):
+  def test_reachable_costs(self):
+    self.assertEqual(walk_grid.reachable_costs(GRID), _bits(GRID_COSTS))
+
+  def test_reachable_costs_small(self):
+    self.assertEqual(walk_grid.reachable_costs(SMALL_GRID), _bits(SMALL_COSTS))
+
+  def test_reachable_costs_single(self):
+    self.assertEqual(walk_grid.reachable_costs([[0]]), 1)
+
+  def test_least_left_from_costs(self):
+    costs = _bits(GRID_COSTS)
+    self.assertEqual(walk_grid.least_left_from_costs(costs, -5), -1)
+    for food in range(15):
+      self.assertEqual(walk_grid.least_left_from_costs(costs, food),
+                       walk_grid.Collector(GRID).least_left(food))
+
+
+class TestFastPath(unittest.TestCase):
+  def setUp(self):
+    walk_grid.reset_fast_path_counts()
+
+  def test_path_bounds(self):
+    self.assertEqual(walk_grid.path_bounds(GRID), (4, 11))
+    self.assertEqual(walk_grid.path_bounds(SMALL_GRID), (4, 5))
+    self.assertEqual(walk_grid.path_bounds([[0]]), (0, 0))
+
+  def test_path_bounds_not_square(self):
+    self.assertRaises(AssertionError, walk_grid.path_bounds,
+                      [[0, 2], [1, 1], [2, 1]])
+    self.assertRaises(AssertionError, walk_grid.answer,
+                      [[0, 2], [1, 1], [2, 1]], 1)
+
+  def test_path_bounds_upper_left_zero(self):
+    self.assertRaises(AssertionError, walk_grid.path_bounds, [[5, 2], [1, 1]])
+
+  def test_cached_path_bounds(self):
+    self.assertEqual(walk_grid.cached_path_bounds(GRID), (4, 11))
+    self.assertEqual(walk_grid.cached_path_bounds(GRID), (4, 11))
+
+  def test_infeasible(self):
+    self.assertEqual(walk_grid.answer(GRID, 3), -1)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['infeasible'], 1)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['search'], 0)
+
+  def test_saturated(self):
+    self.assertEqual(walk_grid.answer(GRID, 11), 0)
+    self.assertEqual(walk_grid.answer(GRID, 12), 1)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['saturated'], 2)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['search'], 0)
+
+  def test_search(self):
+    self.assertEqual(walk_grid.answer(GRID, 7), 0)
+    self.assertEqual(walk_grid.answer(GRID, 10), 3)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['search'], 2)
+
+  def test_fast_path_food(self):
+    for food in list(range(4)) + list(range(11, 15)):
+      self.assertEqual(walk_grid.answer(GRID, food),
+                       walk_grid.Collector(GRID).least_left(food))
+
+
+class TestAnswerAndPath(unittest.TestCase):
+  def _walk(self, grid, steps):
+    walker = walk_grid.Walker(grid)
+    for direction in steps:
+      walker.step(direction)
+      walker.consume()
+    self.assertTrue(walker.at_end())
+    return walker.consumed
+
+  def test_answer_and_path(self):
+    least_left, steps = walk_grid.answer_and_path(GRID, 7)
+    self.assertEqual(least_left, 0)
+    self.assertEqual(self._walk(GRID, steps), 7)
+
+  def test_path_steps(self):
+    self.assertEqual(walk_grid.answer_and_path(GRID, 12),
+                     (1, [walk_grid.RIGHT, walk_grid.RIGHT, walk_grid.DOWN,
+                          walk_grid.DOWN]))
+
+  def test_no_solution(self):
+    self.assertEqual(walk_grid.answer_and_path(GRID, 3), (-1, None))
+    self.assertEqual(walk_grid.answer_and_path(GRID, -3), (-1, None))
+
+  def test_single(self):
+    self.assertEqual(walk_grid.answer_and_path([[0]], 3), (3, []))
+
+  def test_checkpoint_rows(self):
+    grid = [[(i * 7 + j * 3) % 11 for i in range(9)] for j in range(9)]
+    grid[0][0] = 0
+    for food in range(0, 100, 7):
+      expected = walk_grid.least_left_from_costs(
+          walk_grid.reachable_costs(grid), food)
+      for checkpoint_rows in (1, 2, 3, 4, 9, 20, None):
+        least_left, steps = walk_grid.answer_and_path(
+            grid, food, checkpoint_rows=checkpoint_rows)
+        self.assertEqual(least_left, expected)
+        if expected != -1:
+          self.assertEqual(self._walk(grid, steps), food - least_left)
+
+
+class TestCostCache(unittest.TestCase):
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.dir, 'costs.db')
+    self.cache = walk_grid.CostCache(self.path)
+
+  def tearDown(self):
+    self.cache.close()
+    shutil.rmtree(self.dir)
+
+  def test_get_missing(self):
+    self.assertEqual(self.cache.get(GRID), None)
+
+  def test_put_get(self):
+    self.cache.put(GRID, _bits(GRID_COSTS))
+    self.assertEqual(self.cache.get(GRID), _bits(GRID_COSTS))
+    self.assertEqual(self.cache.get(SMALL_GRID), None)
+
+  def test_costs(self):
+    self.assertEqual(self.cache.costs(GRID), _bits(GRID_COSTS))
+    self.assertEqual(self.cache.get(GRID), _bits(GRID_COSTS))
+
+  def test_persistent(self):
+    self.cache.put(GRID, _bits(GRID_COSTS))
+    self.cache.close()
+    self.cache = walk_grid.CostCache(self.path)
+    self.assertEqual(self.cache.get(GRID), _bits(GRID_COSTS))
+
+  def test_version(self):
+    self.cache.put(GRID, _bits(GRID_COSTS))
+    other = walk_grid.CostCache(self.path,
+                                version=walk_grid.CACHE_VERSION + 1)
+    self.assertEqual(other.get(GRID), None)
+    other.close()
+
+  def test_eviction(self):
+    self.cache.max_entries = 2
+    self.cache.put(GRID, _bits(GRID_COSTS))
+    self.cache.put(SMALL_GRID, _bits(SMALL_COSTS))
+    self.cache.put([[0]], 1)
+    self.assertEqual(len(self.cache), 2)
+    self.assertEqual(self.cache.get(GRID), None)
+    self.assertEqual(self.cache.get([[0]]), 1)
+
+  def test_eviction_batch(self):
+    self.cache.max_entries = 20
+    for x in range(21):
+      self.cache.put([[0, x], [x, x]], x)
+    self.assertEqual(len(self.cache), 18)
+    self.assertEqual(self.cache.get([[0, 2], [2, 2]]), None)
+    self.assertEqual(self.cache.get([[0, 3], [3, 3]]), 3)
+
+  def test_answer(self):
+    self.assertEqual(walk_grid.answer(GRID, 7, cache=self.cache), 0)
+    self.assertEqual(walk_grid.answer(GRID, 12, cache=self.cache), 1)
+    self.assertEqual(walk_grid.answer(GRID, 3, cache=self.cache), -1)
+    self.assertEqual(walk_grid.answer(GRID, 9, cache=self.cache), 2)
+    self.assertEqual(len(self.cache), 1)
+
+  def test_answer_counts(self):
+    walk_grid.reset_fast_path_counts()
+    walk_grid.answer(GRID, 7, cache=self.cache)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['cache'], 1)
+    self.assertEqual(walk_grid.FAST_PATH_COUNTS['search'], 0)
+
+
 if __name__ == '__main__':
   unittest.main()
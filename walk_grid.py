@@ -12,10 +12,28 @@ is one, and to report the food left over.
 
 from __future__ import print_function
 
+import hashlib
+import math
+import sqlite3
 import sys
 
 STEP_REPORT = 5000
 
+# Bump this when the layout or meaning of cached cost structures changes so
+# that entries written by an incompatible solver are ignored.
+CACHE_VERSION = 1
+DEFAULT_CACHE_ENTRIES = 10000
+CACHE_TIMEOUT = 30.0
+CACHE_EVICT_FRACTION = 10
+MAX_PATH_BOUNDS = 1000
+
+# How often answer() was decided by each fast path, the cost cache or a
+# search.
+FAST_PATH_COUNTS = {'infeasible': 0, 'saturated': 0, 'cache': 0,
+                    'search': 0}
+
+_path_bounds = {}
+
 
 class Error(Exception):
   """All Walk Grid errors."""
@@ -239,7 +257,308 @@ class Collector(object):
       return min(left_overs)
 
 
-def answer(grid, food):
+def grid_key(grid):
+  """Return a hash of the grid contents suitable as a cache key."""
+
+  text = ';'.join(','.join(str(x) for x in row) for row in grid)
+  return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def reachable_costs(grid):
+  """Compute the costs of all paths through the grid.
+
+  The costs are computed row by row.  Each cell holds an int used as a
+  bit set where bit k is set if some path to that cell costs exactly k.
+
+  Args:
+    grid: list of list of int.  The lists should all be the same size
+      and represent a grid of int values.  The upper left, grid[0][0]
+      should be 0.
+  Returns:
+    An int bit set of the costs of all paths to the lower right corner.
+  """
+
+  assert len(grid) == len(grid[0]), 'Grid is not a square.'
+  assert grid[0][0] == 0
+
+  row_costs = None
+
+  for row in grid:
+    row_costs = next_row_costs(row, row_costs)
+
+  return row_costs[-1]
+
+
+def next_row_costs(row, from_above, limit=None):
+  """Compute the bit sets of path costs for one row of the grid.
+
+  Args:
+    row: list of int.  The room costs of this row.
+    from_above: list of int or None.  The bit sets for the row above, or
+      None for the top row.
+    limit: int or None.  If given, costs above this are dropped.
+  Returns:
+    A list of int bit sets, one for each room in the row.
+  """
+
+  if from_above is None:
+    from_above = [1] + [0] * (len(row) - 1)
+
+  mask = None if limit is None else (1 << (limit + 1)) - 1
+
+  row_costs = []
+  from_left = 0
+  for i, cost in enumerate(row):
+    from_left = (from_above[i] | from_left) << cost
+    if mask is not None:
+      from_left &= mask
+    row_costs.append(from_left)
+
+  return row_costs
+
+
+def path_bounds(grid):
+  """Compute the cheapest and the most expensive path costs.
+
+  One pass over the grid finds the minimum path sum and a second the
+  maximum, each keeping just one row of partial sums.
+
+  Returns:
+    A tuple pair of ints, (min_cost, max_cost).
+  """
+
+  assert len(grid) == len(grid[0]), 'Grid is not a square.'
+  assert grid[0][0] == 0
+
+  bounds = []
+
+  for best in (min, max):
+    row_sums = []
+    for j, row in enumerate(grid):
+      for i, cost in enumerate(row):
+        if i == 0 and j == 0:
+          row_sums = [cost]
+        elif j == 0:
+          row_sums.append(row_sums[i - 1] + cost)
+        elif i == 0:
+          row_sums[i] += cost
+        else:
+          row_sums[i] = best(row_sums[i], row_sums[i - 1]) + cost
+
+    bounds.append(row_sums[-1])
+
+  return tuple(bounds)
+
+
+def cached_path_bounds(grid):
+  """Return path_bounds() for the grid, remembering it between calls."""
+
+  key = grid_key(grid)
+  bounds = _path_bounds.get(key)
+
+  if bounds is None:
+    if len(_path_bounds) >= MAX_PATH_BOUNDS:
+      _path_bounds.clear()
+    bounds = path_bounds(grid)
+    _path_bounds[key] = bounds
+
+  return bounds
+
+
+def reset_fast_path_counts():
+  """Set all of the FAST_PATH_COUNTS back to zero."""
+
+  for key in FAST_PATH_COUNTS:
+    FAST_PATH_COUNTS[key] = 0
+
+
+def least_left_from_costs(costs, food):
+  """Find the least food left over given a bit set of path costs.
+
+  Returns:
+    The least food left, int, or -1 if every path costs more than the food.
+  """
+
+  if food < 0:
+    return -1
+
+  affordable = costs & ((1 << (food + 1)) - 1)
+
+  if not affordable:
+    return -1
+  else:
+    return food - (affordable.bit_length() - 1)
+
+
+def answer_and_path(grid, food, checkpoint_rows=None):
+  """Return the least left or -1 and the steps of a best path.
+
+  The bit sets of path costs are kept only for every checkpoint_rows-th
+  row.  To trace the path back from the lower right corner, the rows
+  between two checkpoints are recomputed one segment at a time, so
+  about sqrt(N) rows are held at once instead of all N.
+
+  Args:
+    grid: list of list of int.  The lists should all be the same size
+      and represent a grid of int values.  The upper left, grid[0][0]
+      should be 0.
+    food: int.  The starting amount of food.
+    checkpoint_rows: int or None.  Rows between checkpoints, by default
+      the square root of the grid size.
+  Returns:
+    A tuple pair where the first element is the least food left, int, or
+    -1 if there is no solution.  The second element is a list of DOWN and
+    RIGHT steps from the upper left to the lower right, or None if there
+    is no solution.
+  """
+
+  assert len(grid) == len(grid[0]), 'Grid is not a square.'
+  assert grid[0][0] == 0
+
+  if food < 0:
+    return -1, None
+
+  size = len(grid)
+  if checkpoint_rows is None:
+    checkpoint_rows = max(1, int(math.ceil(math.sqrt(size))))
+
+  checkpoints = {}
+  row_costs = None
+  for j, row in enumerate(grid):
+    row_costs = next_row_costs(row, row_costs, limit=food)
+    if not j % checkpoint_rows:
+      checkpoints[j] = row_costs
+
+  least_left = least_left_from_costs(row_costs[-1], food)
+  if least_left == -1:
+    return -1, None
+
+  remaining = food - least_left
+  pos_i, pos_j = size - 1, size - 1
+  steps = []
+
+  for first in sorted(checkpoints, reverse=True):
+    segment = [checkpoints.pop(first)]
+    for j in range(first + 1, pos_j + 1):
+      segment.append(next_row_costs(grid[j], segment[-1], limit=food))
+
+    while pos_j >= first and (pos_i, pos_j) != (0, 0):
+      remaining -= grid[pos_j][pos_i]
+      if pos_i and segment[pos_j - first][pos_i - 1] >> remaining & 1:
+        steps.append(RIGHT)
+        pos_i -= 1
+      else:
+        steps.append(DOWN)
+        pos_j -= 1
+
+  steps.reverse()
+  return least_left, steps
+
+
+class CostCache(object):
+  """A persistent cache of path costs keyed by grid contents.
+
+  The cache is a SQLite file so it can be shared between runs and between
+  processes.  Each entry maps a grid_key() to the bit set of path costs
+  from reachable_costs(), stored as hex text.  Entries written with a
+  different version are ignored and the least recently used entries are
+  evicted in batches once there are more than max_entries.  Recency is a counter
+  updated inside each transaction, not a clock.
+  """
+
+  def __init__(self, path, max_entries=DEFAULT_CACHE_ENTRIES,
+               version=CACHE_VERSION):
+    """Open or create the cache file.
+
+    Args:
+      path: str.  The SQLite file name.
+      max_entries: int.  The most entries to keep.
+      version: int.  The version tag for entries read and written.
+    """
+
+    self.path = path
+    self.max_entries = max_entries
+    self.version = version
+    self.connection = sqlite3.connect(path, timeout=CACHE_TIMEOUT)
+
+    with self.connection:
+      self.connection.execute('PRAGMA journal_mode=WAL')
+      # A cache can lose its last few writes in a power failure, so skip
+      # syncing on every commit.
+      self.connection.execute('PRAGMA synchronous=NORMAL')
+      self.connection.execute(
+          'CREATE TABLE IF NOT EXISTS costs ('
+          'key TEXT PRIMARY KEY, version INTEGER, costs TEXT, used INTEGER)')
+      self.connection.execute(
+          'CREATE INDEX IF NOT EXISTS costs_used ON costs (used)')
+
+  def get(self, grid):
+    """Return the cached bit set of costs for the grid or None."""
+
+    key = grid_key(grid)
+
+    with self.connection:
+      row = self.connection.execute(
+          'SELECT costs FROM costs WHERE key = ? AND version = ?',
+          (key, self.version)).fetchone()
+      if row is None:
+        return None
+      self.connection.execute(
+          'UPDATE costs SET used = (SELECT MAX(used) + 1 FROM costs) '
+          'WHERE key = ?', (key,))
+
+    return int(row[0], 16)
+
+  def put(self, grid, costs):
+    """Store the bit set of costs for the grid and evict old entries."""
+
+    with self.connection:
+      self.connection.execute(
+          'INSERT OR REPLACE INTO costs (key, version, costs, used) '
+          'VALUES (?, ?, ?, (SELECT COALESCE(MAX(used), 0) + 1 FROM costs))',
+          (grid_key(grid), self.version, '{0:x}'.format(costs)))
+      self.evict()
+
+  def evict(self):
+    """Drop the least recently used entries if there are too many.
+
+    Once there are more than max_entries, a tenth of them are dropped at
+    once so that the next puts don't need to evict.  Call this inside a
+    transaction.
+    """
+
+    count = self.connection.execute('SELECT COUNT(*) FROM costs').fetchone()[0]
+
+    if count > self.max_entries:
+      keep = self.max_entries - self.max_entries // CACHE_EVICT_FRACTION
+      self.connection.execute(
+          'DELETE FROM costs WHERE used <= '
+          '(SELECT used FROM costs ORDER BY used DESC LIMIT 1 OFFSET ?)',
+          (keep,))
+
+  def costs(self, grid):
+    """Return the bit set of costs for the grid, computing it if needed."""
+
+    costs = self.get(grid)
+
+    if costs is None:
+      costs = reachable_costs(grid)
+      self.put(grid, costs)
+
+    return costs
+
+  def __len__(self):
+    """Return the number of entries, of any version, in the cache."""
+
+    return self.connection.execute('SELECT COUNT(*) FROM costs').fetchone()[0]
+
+  def close(self):
+    """Close the cache file."""
+
+    self.connection.close()
+
+
+def answer(grid, food, cache=None):
   """For the problem, return the least left or -1 if no solution.
 
   Args:
@@ -247,12 +566,28 @@ def answer(grid, food):
       and represent a grid of int values.  The upper left, grid[0][0]
       should be 0.
     food: int.  The starting amount of food.
+    cache: CostCache or None.  If given, the path costs are looked up in
+      or added to the cache instead of searching the grid.
   Returns:
     The smallest amount, int, of left-over food when the path is chosen that
     consumed the most food without running out.  If there is no solution
     then -1 is returned.
   """
 
+  min_cost, max_cost = cached_path_bounds(grid)
+
+  if food < min_cost:
+    FAST_PATH_COUNTS['infeasible'] += 1
+    return -1
+  elif food >= max_cost:
+    FAST_PATH_COUNTS['saturated'] += 1
+    return food - max_cost
+
+  if cache is not None:
+    FAST_PATH_COUNTS['cache'] += 1
+    return least_left_from_costs(cache.costs(grid), food)
+
+  FAST_PATH_COUNTS['search'] += 1
   collector = TrimCollector(grid)
   return collector.least_left(food)
 